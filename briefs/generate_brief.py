@@ -1,53 +1,137 @@
 # generate_brief.py - Auto-generate 1-page PDF briefs
 # Run: python generate_brief.py
 
+import math
+from functools import lru_cache
 import numpy as np
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")  # headless: skip GUI backend start-up
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_pdf import PdfPages
 import yfinance as yf
 from datetime import datetime
+from returns_cache import read_cached_returns, write_cached_returns
+
+# Shared PCG64 generator; pass seed= for reproducible runs
+_rng = np.random.default_rng()
 
 def load_returns(ticker="^GSPC", start="2023-01-01"):
     """Load daily returns"""
+    cached = read_cached_returns(ticker, start)
+    if cached is not None:
+        return cached
     data = yf.download(ticker, start=start, progress=False)
-    return data['Close'].pct_change().dropna().values.astype(float)
+    prices = data['Close'].to_numpy(dtype=np.float64, copy=False).ravel()
+    prices = prices[np.isfinite(prices)]
+    returns = np.diff(prices) / prices[:-1]    # ← pct_change without the pandas round-trip
+    if len(returns):
+        write_cached_returns(ticker, start, returns)
+    return returns
 
-def simulate_gbm(returns, n_sims=10000, horizon=30):
+def simulate_gbm(returns, n_sims=10000, horizon=30, seed=None):
     """Monte Carlo simulator"""
     mu, sigma = np.mean(returns), np.std(returns)
-    paths = np.zeros((n_sims, horizon+1))
+    rng = _rng if seed is None else np.random.default_rng(seed)
+    # float32 halves memory traffic
+    drift, vol = np.float32(mu - 0.5*sigma*sigma), np.float32(sigma)
+    z = rng.standard_normal((n_sims, horizon), dtype=np.float32)
+    z *= vol    # ← in place: no sigma*z / drift+... temporaries
+    z += drift
+    paths = np.empty((n_sims, horizon+1), dtype=np.float32)
     paths[:, 0] = 100
-    for t in range(1, horizon+1):
-        z = np.random.normal(0, 1, n_sims)
-        paths[:, t] = paths[:, t-1] * np.exp((mu - 0.5*sigma**2) + sigma*z)
+    # One draw + one cumulative sum of log-increments instead of a per-day loop
+    np.cumsum(z, axis=1, out=paths[:, 1:])
+    np.exp(paths[:, 1:], out=paths[:, 1:])
+    paths[:, 1:] *= 100
     return paths
 
+def simulate_gbm_terminal(returns, n_sims=10000, horizon=30, seed=None):
+    """Closed-form GBM terminal values (no path matrix).
+    n_sims is rounded down to even (antithetic pairs)."""
+    mu, sigma = float(np.mean(returns)), float(np.std(returns))
+    # Horizon drift/vol folded into two scalars once, not per element
+    drift = horizon*(mu - 0.5*sigma*sigma)
+    vol = sigma*math.sqrt(horizon)
+    rng = _rng if seed is None else np.random.default_rng(seed)
+    # Antithetic pairs (+Z, -Z): same CI width from half the draws
+    half = n_sims // 2
+    z = np.empty(2*half)
+    rng.standard_normal(out=z[:half])
+    np.negative(z[:half], out=z[half:])
+    z *= vol
+    z += drift
+    np.exp(z, out=z)
+    z *= 100
+    return z
+
+@lru_cache(maxsize=1)
+def build_brief_template():
+    """Build the static brief page once; returns (fig, ax_hist, handles) for per-ticker updates"""
+    fig, ax = plt.subplots(figsize=(8.5, 11))  # Letter size
+    fig.patch.set_facecolor('white')
+    handles = {}
+    
+    # Header
+    ax.text(0.5, 0.95, 'DEAL RISK BRIEF', ha='center', va='top', 
+           fontsize=16, fontweight='bold', transform=ax.transAxes)
+    handles['subtitle'] = ax.text(0.5, 0.92, '', ha='center', va='top',
+           fontsize=12, style='italic', transform=ax.transAxes)
+    handles['generated'] = ax.text(0.5, 0.89, '', 
+           ha='center', va='top', fontsize=9, transform=ax.transAxes)
+    
+    # Key metrics box
+    handles['metrics'] = ax.text(0.05, 0.78, '', fontsize=10, family='monospace',
+           bbox=dict(boxstyle='round', facecolor='#f5f5f5', edgecolor='#ccc'),
+           transform=ax.transAxes, va='top')
+    
+    # Chart (data artists are placeholders until the first update)
+    handles['hist'] = ax.stairs(np.zeros(40), np.arange(41), fill=True, alpha=0.7,
+                                edgecolor='black', linewidth=1, facecolor='#2E86AB')
+    handles['var_95'] = ax.axvline(0, color='#A23B72', linestyle='--', linewidth=2)
+    handles['var_99'] = ax.axvline(0, color='#F18F01', linestyle=':', linewidth=2)
+    ax.set_xlabel('Normalized Value', fontsize=9)
+    ax.set_ylabel('Frequency', fontsize=9)
+    handles['title'] = ax.set_title('', fontsize=11, pad=20)
+    ax.grid(alpha=0.3)
+    
+    # Position chart
+    ax.set_position([0.1, 0.25, 0.8, 0.5])
+    
+    # Interpretation
+    handles['interpretation'] = ax.text(0.05, 0.18, '', fontsize=9, transform=ax.transAxes,
+           va='top', linespacing=1.5)
+    
+    # Footer
+    ax.text(0.5, 0.03, 'By Jihan Lahmar | Morocco-Gulf Analytics', 
+           ha='center', va='bottom', fontsize=8, transform=ax.transAxes)
+    ax.text(0.5, 0.01, 'jihan.lahmar@protonmail.com | Portfolio: jihanlahmar.github.io/jihanlahmar',
+           ha='center', va='bottom', fontsize=7, transform=ax.transAxes)
+    
+    # Remove axes
+    ax.set_xticks([])
+    ax.set_yticks([])
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.spines['left'].set_visible(False)
+    ax.spines['bottom'].set_visible(False)
+    
+    return fig, ax, handles
+
 def generate_monte_carlo_brief(ticker="^GSPC", output_path="briefs/tanger-med-var-2026.pdf"):
     """Generate 1-page PDF brief for Monte Carlo project"""
     
     # Run simulation
     returns = load_returns(ticker)
-    sims = simulate_gbm(returns)
-    final_values = sims[:, -1]
-    var_95 = np.percentile(final_values, 5)
-    var_99 = np.percentile(final_values, 1)
+    final_values = simulate_gbm_terminal(returns)
+    # Both tails from one in-place partition pass
+    var_95, var_99 = np.percentile(final_values, [5, 1], overwrite_input=True)
     
-    # Create PDF
-    with PdfPages(output_path) as pdf:
-        fig, ax = plt.subplots(figsize=(8.5, 11))  # Letter size
-        fig.patch.set_facecolor('white')
-        
-        # Header
-        ax.text(0.5, 0.95, 'DEAL RISK BRIEF', ha='center', va='top', 
-               fontsize=16, fontweight='bold', transform=ax.transAxes)
-        ax.text(0.5, 0.92, f'{ticker} | Monte Carlo VaR Analysis', ha='center', va='top',
-               fontsize=12, style='italic', transform=ax.transAxes)
-        ax.text(0.5, 0.89, f'Generated: {datetime.now().strftime("%Y-%m-%d")}', 
-               ha='center', va='top', fontsize=9, transform=ax.transAxes)
-        
-        # Key metrics box
-        metrics_text = f"""
+    # Fill the shared template; only text and data artists change between tickers
+    fig, ax, handles = build_brief_template()
+    handles['subtitle'].set_text(f'{ticker} | Monte Carlo VaR Analysis')
+    handles['generated'].set_text(f'Generated: {datetime.now().strftime("%Y-%m-%d")}')
+    handles['metrics'].set_text(f"""
 KEY METRICS (30-Day Horizon)
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 95% VaR:     {var_95:.2f}  →  {abs(var_95-100):.2f}% potential loss
@@ -55,26 +139,20 @@ KEY METRICS (30-Day Horizon)
 Mean Outcome: {np.mean(final_values):.2f}
 Simulations:  10,000
 Method:       Geometric Brownian Motion
-        """
-        ax.text(0.05, 0.78, metrics_text, fontsize=10, family='monospace',
-               bbox=dict(boxstyle='round', facecolor='#f5f5f5', edgecolor='#ccc'),
-               transform=ax.transAxes, va='top')
-        
-        # Chart
-        ax.hist(final_values, bins=40, alpha=0.7, edgecolor='black', color='#2E86AB')
-        ax.axvline(var_95, color='#A23B72', linestyle='--', linewidth=2, label=f'95% VaR: {var_95:.1f}')
-        ax.axvline(var_99, color='#F18F01', linestyle=':', linewidth=2, label=f'99% VaR: {var_99:.1f}')
-        ax.set_xlabel('Normalized Value', fontsize=9)
-        ax.set_ylabel('Frequency', fontsize=9)
-        ax.set_title(f'Risk Distribution: {ticker}', fontsize=11, pad=20)
-        ax.legend(fontsize=8)
-        ax.grid(alpha=0.3)
-        
-        # Position chart
-        ax.set_position([0.1, 0.25, 0.8, 0.5])
-        
-        # Interpretation
-        interpretation = f"""
+        """)
+    
+    counts, edges = np.histogram(final_values, bins=40)
+    handles['hist'].set_data(counts, edges)
+    handles['var_95'].set_xdata([var_95, var_95])
+    handles['var_95'].set_label(f'95% VaR: {var_95:.1f}')
+    handles['var_99'].set_xdata([var_99, var_99])
+    handles['var_99'].set_label(f'99% VaR: {var_99:.1f}')
+    handles['title'].set_text(f'Risk Distribution: {ticker}')
+    ax.relim()
+    ax.autoscale_view()
+    ax.legend(fontsize=8)
+    
+    handles['interpretation'].set_text(f"""
 INTERPRETATION
 ━━━━━━━━━━━━━━
 • There is a 5% probability that {ticker} could decline by more than {abs(var_95-100):.2f}% 
@@ -85,26 +163,11 @@ INTERPRETATION
 
 • Methodology: Geometric Brownian Motion with 10,000 Monte Carlo simulations. 
   Historical volatility and drift estimated from daily returns since 2023-01-01.
-        """
-        ax.text(0.05, 0.18, interpretation, fontsize=9, transform=ax.transAxes,
-               va='top', linespacing=1.5)
-        
-        # Footer
-        ax.text(0.5, 0.03, 'By Jihan Lahmar | Morocco-Gulf Analytics', 
-               ha='center', va='bottom', fontsize=8, transform=ax.transAxes)
-        ax.text(0.5, 0.01, 'jihan.lahmar@protonmail.com | Portfolio: jihanlahmar.github.io/jihanlahmar',
-               ha='center', va='bottom', fontsize=7, transform=ax.transAxes)
-        
-        # Remove axes
-        ax.set_xticks([])
-        ax.set_yticks([])
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-        ax.spines['left'].set_visible(False)
-        ax.spines['bottom'].set_visible(False)
-        
+        """)
+    
+    # Create PDF (the figure stays open for the next brief)
+    with PdfPages(output_path) as pdf:
         pdf.savefig(fig, bbox_inches='tight')
-        plt.close()
     
     print(f'✅ Saved: {output_path}')
     return output_path
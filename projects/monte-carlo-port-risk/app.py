@@ -2,10 +2,12 @@
 # Deploy: https://streamlit.io/cloud
 
 import streamlit as st
+import math
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import yfinance as yf
+from returns_cache import read_cached_returns, write_cached_returns
 
 # Page config
 st.set_page_config(page_title="Monte Carlo Risk Simulator", page_icon="📊", layout="wide")
@@ -25,33 +27,88 @@ start_date = st.sidebar.date_input("Start Date", value=pd.to_datetime("2023-01-0
 horizon_days = st.sidebar.slider("Forecast Horizon (days)", 7, 90, 30)
 n_sims = st.sidebar.selectbox("Simulations", [1000, 5000, 10000], index=2)
 confidence = st.sidebar.slider("Confidence Level", 90, 99, 95) / 100
+seed = int(st.sidebar.number_input("Random Seed", min_value=0, value=42, step=1))
 
 # Load data function
 @st.cache_data
 def load_returns(ticker, start):
     try:
+        cached = read_cached_returns(ticker, start)
+        if cached is not None:
+            return cached
         data = yf.download(ticker, start=start, progress=False)
         if len(data) == 0:
             return np.array([])
-        close_prices = data['Close'].dropna()
-        if len(close_prices) < 30:
+        prices = data['Close'].to_numpy(dtype=np.float64, copy=False).ravel()
+        prices = prices[np.isfinite(prices)]
+        if len(prices) < 30:
             return np.array([])
-        returns = close_prices.pct_change().dropna().values
-        return returns.astype(float)
+        returns = np.diff(prices) / prices[:-1]    # ← pct_change without the pandas round-trip
+        write_cached_returns(ticker, start, returns)
+        return returns
     except Exception as e:
         return np.array([])
 
 # Monte Carlo engine
-def simulate_gbm(returns, n_sims, horizon):
+def simulate_gbm(returns, n_sims, horizon, seed=None):
     mu = np.mean(returns)
     sigma = np.std(returns)
-    paths = np.zeros((n_sims, horizon+1))
+    rng = np.random.default_rng(seed)
+    # float32 halves memory traffic
+    drift, vol = np.float32(mu - 0.5*sigma*sigma), np.float32(sigma)
+    z = rng.standard_normal((n_sims, horizon), dtype=np.float32)
+    z *= vol    # ← in place: no sigma*z / drift+... temporaries
+    z += drift
+    paths = np.empty((n_sims, horizon+1), dtype=np.float32)
     paths[:, 0] = 100
-    for t in range(1, horizon+1):
-        z = np.random.normal(0, 1, n_sims)
-        paths[:, t] = paths[:, t-1] * np.exp((mu - 0.5*sigma**2) + sigma*z)
+    # One draw + one cumulative sum of log-increments instead of a per-day loop
+    np.cumsum(z, axis=1, out=paths[:, 1:])
+    np.exp(paths[:, 1:], out=paths[:, 1:])
+    paths[:, 1:] *= 100
     return paths
 
+def simulate_gbm_terminal(returns, n_sims, horizon, seed=None):
+    """Closed-form GBM terminal values (no path matrix).
+    n_sims is rounded down to even (antithetic pairs)."""
+    mu, sigma = float(np.mean(returns)), float(np.std(returns))
+    # Horizon drift/vol folded into two scalars once, not per element
+    drift = horizon*(mu - 0.5*sigma*sigma)
+    vol = sigma*math.sqrt(horizon)
+    rng = np.random.default_rng(seed)
+    # Antithetic pairs (+Z, -Z): same CI width from half the draws
+    half = n_sims // 2
+    z = np.empty(2*half)
+    rng.standard_normal(out=z[:half])
+    np.negative(z[:half], out=z[half:])
+    z *= vol
+    z += drift
+    np.exp(z, out=z)
+    z *= 100
+    return z
+
+# Simulation cached on the inputs it depends on, so reruns that only change the
+# confidence level (or nothing at all) skip straight to the percentile
+@st.cache_data(max_entries=32)
+def run_simulation(ticker, start, n_sims, horizon, seed):
+    returns = load_returns(ticker, start)
+    return simulate_gbm_terminal(returns, n_sims, horizon, seed=seed)
+
+# Chart reused across reruns (per session, so concurrent users don't share artists)
+HIST_BINS = 40
+
+def get_chart():
+    if 'chart' not in st.session_state:
+        fig, ax = plt.subplots(figsize=(10, 5))
+        # One step patch for the whole histogram instead of HIST_BINS bar patches
+        hist = ax.stairs(np.zeros(HIST_BINS), np.arange(HIST_BINS+1), fill=True,
+                         alpha=0.7, edgecolor='black', linewidth=1, facecolor='#2E86AB')
+        var_line = ax.axvline(0, color='#A23B72', linestyle='--', linewidth=2)
+        ax.set_xlabel('Normalized Value')
+        ax.set_ylabel('Frequency')
+        ax.grid(alpha=0.3)
+        st.session_state.chart = (fig, ax, hist, var_line)
+    return st.session_state.chart
+
 # Main app
 st.markdown("---")
 
@@ -65,9 +122,10 @@ if st.button("🚀 Run Simulation", type="primary"):
         st.stop()
     
     # Run simulation
-    sims = simulate_gbm(returns, n_sims, horizon_days)
-    final_values = sims[:, -1]
-    var_value = np.percentile(final_values, (1-confidence)*100)
+    final_values = run_simulation(ticker, start_date, n_sims, horizon_days, seed)
+    # cache_data hands back a fresh copy each rerun, so partitioning it in place is safe;
+    # selection (not a sort), and element order is irrelevant to the histogram
+    var_value = np.percentile(final_values, (1-confidence)*100, overwrite_input=True)
     
     # Display metrics
     col1, col2, col3 = st.columns(3)
@@ -75,16 +133,18 @@ if st.button("🚀 Run Simulation", type="primary"):
     col2.metric("Mean", f"{np.mean(final_values):.2f}")
     col3.metric("Simulations", f"{n_sims:,}")
     
-    # Plot
-    fig, ax = plt.subplots(figsize=(10, 5))
-    ax.hist(final_values, bins=40, alpha=0.7, edgecolor='black', color='#2E86AB')
-    ax.axvline(var_value, color='#A23B72', linestyle='--', linewidth=2, label=f'{int(confidence*100)}% VaR: {var_value:.1f}')
-    ax.set_xlabel('Normalized Value')
-    ax.set_ylabel('Frequency')
+    # Plot: update the session's chart in place instead of rebuilding it
+    fig, ax, hist, var_line = get_chart()
+    counts, edges = np.histogram(final_values, bins=HIST_BINS)
+    hist.set_data(counts, edges)
+    var_line.set_xdata([var_value, var_value])
+    var_line.set_label(f'{int(confidence*100)}% VaR: {var_value:.1f}')
     ax.set_title(f'{ticker}: {horizon_days}-Day Risk Distribution ({n_sims:,} sims)')
+    ax.relim()
+    ax.autoscale_view()
     ax.legend()
-    ax.grid(alpha=0.3)
-    st.pyplot(fig)
+    fig.canvas.draw_idle()
+    st.pyplot(fig, clear_figure=False)
     
     # Plain-English interpretation
     st.info(f"💡 **Interpretation**: There's a {int((1-confidence)*100)}% chance that {ticker} could lose more than **{abs(var_value-100):.2f}%** over {horizon_days} days.")
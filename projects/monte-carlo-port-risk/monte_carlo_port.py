@@ -2,42 +2,114 @@
 # Morocco-Gulf Exposure: Monte Carlo Risk Simulator
 # Run: python monte_carlo_port.py
 
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")  # headless: skip GUI backend start-up
 import matplotlib.pyplot as plt
 import yfinance as yf
+from returns_cache import read_cached_returns, write_cached_returns
+
+# Shared PCG64 generator; pass seed= for reproducible runs
+_rng = np.random.default_rng()
+
+# Paths per RNG substream; fixed (not per core) so a seed gives the same draws anywhere
+CHUNK_SIMS = 50_000
+# Below this many paths a process pool costs more than it saves
+PARALLEL_MIN_SIMS = 200_000
 
 def load_returns(ticker="^GSPC", start="2023-01-01"):
     """Load daily returns for exposure proxy"""
     try:
-        data = yf.download(ticker, start=start)['Close'].pct_change().dropna()
-        if len(data) < 30:
-            print(f"⚠️ Warning: Only {len(data)} days of data for {ticker}")
-        return data
+        cached = read_cached_returns(ticker, start)
+        if cached is not None:
+            return cached
+        close_prices = yf.download(ticker, start=start)['Close']
+        prices = close_prices.to_numpy(dtype=np.float64, copy=False).ravel()
+        prices = prices[np.isfinite(prices)]
+        returns = np.diff(prices) / prices[:-1]    # ← pct_change without the pandas round-trip
+        if len(returns) < 30:
+            print(f"⚠️ Warning: Only {len(returns)} days of data for {ticker}")
+        if len(returns):
+            write_cached_returns(ticker, start, returns)
+        return returns
     except Exception as e:
         print(f"❌ Error loading {ticker}: {e}")
-        return pd.Series()
+        return np.array([])
 
-def simulate_gbm(returns, n_sims=10000, horizon_days=30):
+def simulate_gbm(returns, n_sims=10000, horizon_days=30, seed=None):
     """Geometric Brownian Motion simulator"""
     mu = float(returns.mean())      # ← Convert to float
-    sigma = float(returns.std())    # ← Convert to float
-    paths = np.zeros((n_sims, horizon_days+1))
+    sigma = float(returns.std(ddof=1))    # ← sample std, as pandas computed it
+    rng = _rng if seed is None else np.random.default_rng(seed)
+    # float32 halves memory traffic
+    drift, vol = np.float32(mu - 0.5*sigma*sigma), np.float32(sigma)
+    z = rng.standard_normal((n_sims, horizon_days), dtype=np.float32)
+    z *= vol    # ← in place: no sigma*z / drift+... temporaries
+    z += drift
+    paths = np.empty((n_sims, horizon_days+1), dtype=np.float32)
     paths[:, 0] = 100
-    for t in range(1, horizon_days+1):
-        z = np.random.normal(0, 1, n_sims)
-        paths[:, t] = paths[:, t-1] * np.exp((mu - 0.5*sigma**2) + sigma*z)
+    # One draw + one cumulative sum of log-increments instead of a per-day loop
+    np.cumsum(z, axis=1, out=paths[:, 1:])
+    np.exp(paths[:, 1:], out=paths[:, 1:])
+    paths[:, 1:] *= 100
     return paths
 
+def _chunk_sizes(n_sims):
+    """Split n_sims (rounded down to even) into CHUNK_SIMS-sized antithetic chunks"""
+    n_full, rest = divmod(2*(n_sims // 2), CHUNK_SIMS)
+    sizes = [CHUNK_SIMS]*n_full
+    if rest or not sizes:
+        sizes.append(rest)
+    return sizes
+
+def _terminal_chunk(drift, vol, n_sims, seed_seq):
+    """Worker: terminal values for one chunk on its own RNG substream"""
+    rng = np.random.default_rng(seed_seq)
+    # Antithetic pairs (+Z, -Z): same CI width from half the draws
+    half = n_sims // 2
+    z = np.empty(2*half)
+    rng.standard_normal(out=z[:half])
+    np.negative(z[:half], out=z[half:])
+    z *= vol
+    z += drift
+    np.exp(z, out=z)
+    z *= 100
+    return z
+
+def simulate_gbm_terminal(returns, n_sims=10000, horizon_days=30, seed=None, n_workers=None):
+    """Closed-form GBM terminal values (no path matrix), split across processes.
+    n_sims is rounded down to even (antithetic pairs). The pool only starts at
+    PARALLEL_MIN_SIMS paths; run_brief's default 10k always runs inline."""
+    mu = float(returns.mean())
+    sigma = float(returns.std(ddof=1))
+    # Horizon drift/vol folded into two scalars once, not per element
+    drift = horizon_days*(mu - 0.5*sigma*sigma)
+    vol = sigma*math.sqrt(horizon_days)
+    sizes = _chunk_sizes(n_sims)
+    # Independent child streams per chunk, so forked workers never share RNG state
+    seed_seqs = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = ([drift]*len(sizes), [vol]*len(sizes), sizes, seed_seqs)
+    n_workers = min(n_workers or os.cpu_count() or 1, len(sizes))
+    if n_workers == 1 or n_sims < PARALLEL_MIN_SIMS:
+        chunks = map(_terminal_chunk, *args)
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            chunks = list(pool.map(_terminal_chunk, *args))
+    return np.concatenate(list(chunks))
+
 def run_brief(ticker="^GSPC"):
     """Run simulation + calculate 95% VaR"""
     returns = load_returns(ticker)
     if len(returns) < 30:
         print(f"❌ Not enough data for {ticker}. Try ^GSPC, MAD=X, or SAR=X")
         return None, None
-    sims = simulate_gbm(returns)
-    final_values = sims[:, -1]
-    var_95 = np.percentile(final_values, 5)
+    final_values = simulate_gbm_terminal(returns)
+    # Selection (not a sort) in place; element order is irrelevant to the histogram
+    var_95 = np.percentile(final_values, 5, overwrite_input=True)
     return var_95, final_values
 
 if __name__ == "__main__":
@@ -53,7 +125,9 @@ if __name__ == "__main__":
     
     if var is not None:
         plt.figure(figsize=(10,6))
-        plt.hist(dist, bins=40, alpha=0.7, edgecolor='black', color='#2E86AB')
+        # Bin in NumPy and draw one step patch rather than 40 bar patches
+        counts, edges = np.histogram(dist, bins=40)
+        plt.stairs(counts, edges, fill=True, alpha=0.7, edgecolor='black', linewidth=1, facecolor='#2E86AB')
         plt.axvline(var, color='#A23B72', linestyle='--', linewidth=2, label=f'95% VaR: {var:.1f}')
         plt.title(f'{ticker}: 30-Day Risk Distribution (Monte Carlo, 10k sims)')
         plt.xlabel('Normalized Value')
@@ -61,6 +135,6 @@ if __name__ == "__main__":
         plt.legend()
         plt.grid(alpha=0.3)
         plt.tight_layout()
-        plt.savefig('risk_brief_chart.png', dpi=300, bbox_inches='tight')
+        plt.savefig('risk_brief_chart.png', dpi=150, bbox_inches='tight')  # ← 150 dpi is plenty for a PDF-embedded chart
         print(f'✅ Saved: risk_brief_chart.png')
         print(f'📊 95% VaR (30-day): {var:.1f} | 5% chance of loss > {abs(var-100):.1f}%')
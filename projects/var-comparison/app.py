@@ -7,6 +7,7 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import yfinance as yf
 from scipy.stats import norm
+from returns_cache import read_cached_returns, write_cached_returns
 
 # Page config
 st.set_page_config(page_title="VaR Comparison Engine", page_icon="📊", layout="wide")
@@ -25,37 +26,70 @@ ticker = st.sidebar.selectbox(
 start_date = st.sidebar.date_input("Start Date", value=pd.to_datetime("2023-01-01"))
 confidence = st.sidebar.slider("Confidence Level", 90, 99, 95) / 100
 n_sims = st.sidebar.selectbox("Monte Carlo Simulations", [5000, 10000, 20000], index=1)
+seed = int(st.sidebar.number_input("Random Seed", min_value=0, value=42, step=1))
 
 # Load data function
 @st.cache_data
 def load_returns(ticker, start):
     try:
+        cached = read_cached_returns(ticker, start)
+        if cached is not None:
+            return cached
         data = yf.download(ticker, start=start, progress=False)
         if len(data) == 0:
             return np.array([])
-        close_prices = data['Close'].dropna()
-        if len(close_prices) < 30:
+        prices = data['Close'].to_numpy(dtype=np.float64, copy=False).ravel()
+        prices = prices[np.isfinite(prices)]
+        if len(prices) < 30:
             return np.array([])
-        returns = close_prices.pct_change().dropna().values
-        return returns.astype(float)
+        returns = np.diff(prices) / prices[:-1]    # ← pct_change without the pandas round-trip
+        write_cached_returns(ticker, start, returns)
+        return returns
     except Exception as e:
         return np.array([])
 
 # VaR Methods
+# Normal tail quantiles for every slider level (90-99%), tabulated in one vectorized call
+_PPF_LEVELS = tuple(np.arange(90, 100) / 100)
+_PPF = dict(zip((round(c, 6) for c in _PPF_LEVELS), norm.ppf(1 - np.asarray(_PPF_LEVELS)).tolist()))
+
+def _norm_tail(confidence):
+    """norm.ppf(1 - confidence); scalar tabulated levels skip the scipy call"""
+    if np.ndim(confidence) == 0:
+        z = _PPF.get(round(float(confidence), 6))
+        if z is not None:
+            return z
+    return norm.ppf(1 - np.asarray(confidence))
+
 def historical_var(returns, confidence):
     """Historical VaR: percentile of actual returns"""
     return np.percentile(returns, (1 - confidence) * 100)
 
-def parametric_var(returns, confidence):
+def parametric_var(mu, sigma, confidence):
     """Parametric VaR: assumes normal distribution"""
-    mu, sigma = np.mean(returns), np.std(returns)
-    return mu + sigma * norm.ppf(1 - confidence)
+    return mu + sigma * _norm_tail(confidence)
+
+# Cached on the inputs the draw depends on; a confidence change only redoes the percentile.
+# seed is required: an unseeded draw would be cached and replayed as if it were random
+@st.cache_data(max_entries=32)
+def simulate_returns(mu, sigma, n_sims, horizon, seed):
+    """Simulated horizon returns (n_sims rounded down to even, antithetic pairs)"""
+    drift, vol = float(mu * horizon), float(sigma * np.sqrt(horizon))
+    rng = np.random.default_rng(seed)
+    # Antithetic pairs (+Z, -Z): same CI width from half the draws
+    half = n_sims // 2
+    simulated_returns = np.empty(2*half)
+    rng.standard_normal(out=simulated_returns[:half])
+    np.negative(simulated_returns[:half], out=simulated_returns[half:])
+    simulated_returns *= vol    # ← scale in place, no temporaries
+    simulated_returns += drift
+    return simulated_returns
 
-def monte_carlo_var(returns, confidence, n_sims=10000, horizon=1):
+def monte_carlo_var(mu, sigma, confidence, seed, n_sims=10000, horizon=1):
     """Monte Carlo VaR: simulate future paths"""
-    mu, sigma = np.mean(returns), np.std(returns)
-    simulated_returns = np.random.normal(mu * horizon, sigma * np.sqrt(horizon), n_sims)
-    return np.percentile(simulated_returns, (1 - confidence) * 100)
+    simulated_returns = simulate_returns(mu, sigma, n_sims, horizon, seed)
+    # st.cache_data keeps its own pickled copy, so partitioning this one in place is safe
+    return np.percentile(simulated_returns, (1 - confidence) * 100, overwrite_input=True)
 
 # Main app
 st.markdown("---")
@@ -69,10 +103,11 @@ if st.button("🚀 Compare VaR Methods", type="primary"):
         st.info("💡 **Try**: ^GSPC (S&P 500) or AAPL (Apple)")
         st.stop()
     
-    # Calculate VaR for all 3 methods
+    # Calculate VaR for all 3 methods (moments computed once, shared by both models)
+    mu, sigma = float(returns.mean()), float(returns.std())
     var_historical = historical_var(returns, confidence)
-    var_parametric = parametric_var(returns, confidence)
-    var_monte_carlo = monte_carlo_var(returns, confidence, n_sims)
+    var_parametric = parametric_var(mu, sigma, confidence)
+    var_monte_carlo = monte_carlo_var(mu, sigma, confidence, seed, n_sims)
     
     # Display metrics
     st.subheader(f"{int(confidence*100)}% VaR Comparison for {ticker}")
@@ -93,9 +128,7 @@ if st.button("🚀 Compare VaR Methods", type="primary"):
     ax.grid(axis='y', alpha=0.3)
     
     # Add value labels on bars
-    for bar, val in zip(bars, values):
-        ax.text(bar.get_x() + bar.get_width()/2, val, f'{val:.4f}', 
-               ha='center', va='bottom' if val < 0 else 'top', fontsize=10, fontweight='bold')
+    ax.bar_label(bars, labels=[f'{val:.4f}' for val in values], padding=2, fontsize=10, fontweight='bold')
     
     st.pyplot(fig)
     
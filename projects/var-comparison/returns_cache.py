@@ -0,0 +1,47 @@
+# returns_cache.py - Best-effort on-disk cache of daily returns
+# Shared by the scripts in this directory; any failure is just a cache miss
+
+import contextlib
+import os
+import tempfile
+import time
+from pathlib import Path
+import pandas as pd
+
+# ~/.cache/morocco-gulf, so cold starts skip the download
+CACHE_DIR = Path.home() / ".cache" / "morocco-gulf"
+CACHE_MAX_AGE = 24 * 60 * 60  # seconds
+
+def _cache_path(ticker, start):
+    return CACHE_DIR / f"{ticker}_{pd.Timestamp(start).date().isoformat()}.parquet"
+
+def read_cached_returns(ticker, start):
+    """Cached returns, or None on a miss; a file that can't be read is removed so it gets re-downloaded"""
+    path = _cache_path(ticker, start)
+    try:
+        if not path.exists() or time.time() - path.stat().st_mtime >= CACHE_MAX_AGE:
+            return None
+        returns = pd.read_parquet(path)['ret'].to_numpy()
+        if len(returns):
+            return returns
+    except Exception:
+        pass
+    with contextlib.suppress(OSError):
+        path.unlink()
+    return None
+
+def write_cached_returns(ticker, start, returns):
+    """Write via temp file + os.replace, so readers never see a partial file"""
+    path = _cache_path(ticker, start)
+    tmp = None
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+        os.close(fd)
+        pd.DataFrame({'ret': returns}).to_parquet(tmp)
+        os.chmod(tmp, 0o644)    # ← mkstemp creates 0600; match a plain write under the usual umask
+        os.replace(tmp, path)
+    except Exception:
+        if tmp is not None:
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
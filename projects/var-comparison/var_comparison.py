@@ -5,72 +5,103 @@
 
 import numpy as np
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")  # headless: skip GUI backend start-up
 import matplotlib.pyplot as plt
 import yfinance as yf
 from scipy.stats import norm
+from returns_cache import read_cached_returns, write_cached_returns
+
+# Shared PCG64 generator; pass seed= for reproducible runs
+_rng = np.random.default_rng()
 
 def load_returns(ticker="TASI.SR", start="2023-01-01"):
     """Load daily returns for Morocco-Gulf exposure proxy"""
-    data = yf.download(ticker, start=start)['Close'].pct_change().dropna()
-    return data
+    cached = read_cached_returns(ticker, start)
+    if cached is not None:
+        return cached
+    close_prices = yf.download(ticker, start=start)['Close']
+    prices = close_prices.to_numpy(dtype=np.float64, copy=False).ravel()
+    prices = prices[np.isfinite(prices)]
+    returns = np.diff(prices) / prices[:-1]    # ← pct_change without the pandas round-trip
+    if len(returns):
+        write_cached_returns(ticker, start, returns)
+    return returns
+
+# Normal tail quantiles for the usual confidence levels, tabulated in one vectorized call
+_PPF_LEVELS = (0.90, 0.95, 0.99)
+_PPF = dict(zip((round(c, 6) for c in _PPF_LEVELS), norm.ppf(1 - np.asarray(_PPF_LEVELS)).tolist()))
+
+def _norm_tail(confidence):
+    """norm.ppf(1 - confidence); scalar tabulated levels skip the scipy call"""
+    if np.ndim(confidence) == 0:
+        z = _PPF.get(round(float(confidence), 6))
+        if z is not None:
+            return z
+    return norm.ppf(1 - np.asarray(confidence))
 
 def historical_var(returns, confidence=0.95):
     """Historical VaR: percentile of actual returns"""
     return np.percentile(returns, (1 - confidence) * 100)
 
-def parametric_var(returns, confidence=0.95):
+def parametric_var(mu, sigma, confidence=0.95):
     """Parametric VaR: assumes normal distribution"""
-    mu, sigma = returns.mean(), returns.std()
-    return mu + sigma * norm.ppf(1 - confidence)
+    return mu + sigma * _norm_tail(confidence)
 
-def monte_carlo_var(returns, confidence=0.95, n_sims=10000, horizon=1):
-    """Monte Carlo VaR: simulate future paths"""
-    mu, sigma = returns.mean(), returns.std()
+def monte_carlo_var(mu, sigma, confidence=0.95, n_sims=10000, horizon=1, seed=None):
+    """Monte Carlo VaR: simulate future paths (n_sims rounded down to even, antithetic pairs)"""
     # Simulate horizon-day returns
-    simulated_returns = np.random.normal(mu * horizon, sigma * np.sqrt(horizon), n_sims)
-    return np.percentile(simulated_returns, (1 - confidence) * 100)
+    drift, vol = float(mu * horizon), float(sigma * np.sqrt(horizon))
+    rng = _rng if seed is None else np.random.default_rng(seed)
+    # Antithetic pairs (+Z, -Z): same CI width from half the draws
+    half = n_sims // 2
+    simulated_returns = np.empty(2*half)
+    rng.standard_normal(out=simulated_returns[:half])
+    np.negative(simulated_returns[:half], out=simulated_returns[half:])
+    simulated_returns *= vol    # ← scale in place, no temporaries
+    simulated_returns += drift
+    return np.percentile(simulated_returns, (1 - confidence) * 100, overwrite_input=True)
 
-def compare_var(returns, confidence_levels=[0.95, 0.99]):
-    """Compare all 3 methods across confidence levels"""
-    results = {}
-    for conf in confidence_levels:
-        results[conf] = {
-            'Historical': historical_var(returns, conf),
-            'Parametric': parametric_var(returns, conf),
-            'Monte Carlo': monte_carlo_var(returns, conf)
-        }
-    return results
-ef plot_comparison(returns, results):
+# Column order of the compare_var results array
+METHODS = ('Historical', 'Parametric', 'Monte Carlo')
+
+def compare_var(returns, confidence_levels=(0.95, 0.99)):
+    """Compare all 3 methods across confidence levels.
+    Returns (confs, results) where results[i, j] is METHODS[j] VaR at confs[i]"""
+    confs = np.asarray(confidence_levels, dtype=float)
+    mu, sigma = float(returns.mean()), float(returns.std(ddof=1))    # ← sample std, as pandas computed it
+    results = np.empty((len(confs), len(METHODS)))
+    # Each method takes the whole confidence vector, so one quantile pass per column
+    results[:, 0] = historical_var(returns, confs)
+    results[:, 1] = parametric_var(mu, sigma, confs)
+    results[:, 2] = monte_carlo_var(mu, sigma, confs)
+    return confs, results
+
+def plot_comparison(confs, results):
     """Create side-by-side comparison chart"""
-    methods = ['Historical', 'Parametric', 'Monte Carlo']
-    conf_levels = list(results.keys())
-    
-    fig, axes = plt.subplots(1, len(conf_levels), figsize=(6*len(conf_levels), 4))
-    if len(conf_levels) == 1:
+    fig, axes = plt.subplots(1, len(confs), figsize=(6*len(confs), 4))
+    if len(confs) == 1:
         axes = [axes]
     
-    for ax, conf in zip(axes, conf_levels):
-        values = [results[conf][m] for m in methods]
-        bars = ax.bar(methods, values, color=['#2E86AB', '#A23B72', '#F18F01'], alpha=0.8)
+    for ax, conf, values in zip(axes, confs, results):
+        bars = ax.bar(METHODS, values, color=['#2E86AB', '#A23B72', '#F18F01'], alpha=0.8)
         ax.axhline(0, color='gray', linestyle='--', linewidth=0.5)
         ax.set_title(f'{int(conf*100)}% Confidence VaR')
         ax.set_ylabel('Return')
         ax.grid(axis='y', alpha=0.3)
         # Add value labels on bars
-        for bar, val in zip(bars, values):
-            ax.text(bar.get_x() + bar.get_width()/2, val, f'{val:.3f}', 
-                   ha='center', va='bottom' if val < 0 else 'top', fontsize=9)
+        ax.bar_label(bars, labels=[f'{val:.3f}' for val in values], padding=2, fontsize=9)
     
     plt.suptitle('VaR Method Comparison: Morocco-Gulf Exposure', fontsize=14, y=1.02)
     plt.tight_layout()
     plt.savefig('var_comparison_chart.png', dpi=300, bbox_inches='tight')
     print(f'✅ Saved: var_comparison_chart.png')
 
-def generate_recommendation(results):
+def generate_recommendation(confs, results):
     """Simple logic to recommend a method"""
     # If methods disagree significantly, prefer Historical (no assumptions)
-    conf_95 = results[0.95]
-    spread = max(conf_95.values()) - min(conf_95.values())
+    conf_95 = results[list(confs).index(0.95)]
+    spread = np.ptp(conf_95)
     if spread > 0.02:  # 2% difference is significant
         return "Methods diverge → Prefer Historical VaR (no distribution assumptions)"
     else:
@@ -82,17 +113,17 @@ if __name__ == "__main__":
     returns = load_returns(ticker)
     
     # Run comparison
-    results = compare_var(returns)
+    confs, results = compare_var(returns)
     
     # Print results
     print(f"\n📊 VaR Comparison for {ticker}")
     print(f"{'Confidence':<12} {'Historical':<12} {'Parametric':<12} {'Monte Carlo':<12}")
     print("-" * 48)
-    for conf, methods in results.items():
-        print(f"{int(conf*100):<12}% {methods['Historical']:<12.4f} {methods['Parametric']:<12.4f} {methods['Monte Carlo']:<12.4f}")
+    for conf, (hist, param, mc) in zip(confs, results):
+        print(f"{int(conf*100):<12}% {hist:<12.4f} {param:<12.4f} {mc:<12.4f}")
       # Generate recommendation
-    rec = generate_recommendation(results)
+    rec = generate_recommendation(confs, results)
     print(f"\n💡 Recommendation: {rec}")
     
     # Plot
-    plot_comparison(returns, results)
+    plot_comparison(confs, results)